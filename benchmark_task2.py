@@ -0,0 +1,99 @@
+import os
+import random
+import sys
+import tempfile
+import time  # for timing
+
+from task2 import Task2
+
+"""
+Compares the run time of the search algorithms of Task2 on the sample data and on
+large synthetic data. numpy must be installed.
+Usage: python benchmark_task2.py data/sample_complex_ebola_data.csv data/sample_partial_time_series1.csv
+
+"""
+
+ALGORITHMS = ["kmp", "boyer-moore", "numpy"]
+
+
+def time_search(complex_ebola_file, pattern, repeats=5, reads=3):
+    """
+    Reads the data and searches it for the pattern with each of the algorithms. Prints the fastest time
+    taken to read the data, the first search, which includes building the numpy arrays, and the fastest of
+    the following searches of the same data. read + first search is the run time of task2().
+    :param complex_ebola_file: The path to the complex data
+    :param pattern: The pattern to search for, a list of integers
+    :param repeats: The number of times each search is run after the first one
+    :param reads: The number of times the data is read
+    """
+    mills = 1e3
+    print("  %-12s %10s %13s %12s %10s" % ("", "read ms", "1st search ms", "search ms", "total ms"))
+    for algorithm in ALGORITHMS:
+        t2 = Task2()
+        t2._pattern = pattern
+        t2._pattern_ln = len(pattern)
+
+        read_time = float("inf")
+        for _ in range(reads):
+            start = time.time()
+            complex_data_dic = t2.read_complex_data(complex_ebola_file, algorithm == "numpy")
+            read_time = min(read_time, time.time() - start)
+
+        first = time.time()
+        result = t2.search_data(complex_data_dic, algorithm)
+        first = time.time() - first
+
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.time()
+            t2.search_data(complex_data_dic, algorithm)
+            best = min(best, time.time() - start)
+
+        print("  %-12s %10.3f %13.3f %12.3f %10.3f  %s" % (algorithm, read_time * mills, first * mills, best * mills,
+                                                           (read_time + first) * mills, ", ".join(result)))
+
+
+def synthetic_data(filename, num_series, series_ln, max_step):
+    """
+    Writes random cumulative series to a file in the format of the complex data.
+    :param filename: The name of the file to write
+    :param num_series: The number of series
+    :param series_ln: The length of each series
+    :param max_step: The largest increase between two values. Small steps repeat values more often
+    :return: The values of the last series
+    """
+    with open(filename, 'wt') as data:
+        data.write("Country,Locality,Indicator,Date,Value\n")
+        for s in range(num_series):
+            total = 0
+            values = []
+            for i in range(series_ln):
+                total += random.randint(0, max_step)
+                values.append(total)
+                data.write("Synthetic,Locality %d,cumulative_cases,%d,%d\n" % (s, i, total))
+    return values
+
+
+if __name__ == '__main__':
+    try:
+        complex_filename = sys.argv[1]
+        partial_filename = sys.argv[2]
+    except IndexError:
+        print("Error: The program requires two strings as arguments")
+        sys.exit()
+
+    t2 = Task2()
+    t2.construct_pattern(partial_filename)
+    print("sample data, pattern length %d" % t2._pattern_ln)
+    time_search(complex_filename, t2._pattern)
+
+    random.seed(2018)
+    synthetic_filename = os.path.join(tempfile.mkdtemp(), "synthetic.csv")
+    for max_step in [3, 0]:
+        last = synthetic_data(synthetic_filename, 20, 50000, max_step)
+        for pattern_ln in [5, 50, 500]:
+            # a pattern of zeros ending in one, so the numpy search falls back on rolling hashes
+            pattern = last[-pattern_ln - 100:-100] if max_step else [0] * (pattern_ln - 1) + [1]
+            print("synthetic data, 20 series of 50000, steps 0-%d, pattern length %d" % (max_step, pattern_ln))
+            time_search(synthetic_filename, pattern, repeats=2)
+    os.remove(synthetic_filename)
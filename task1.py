@@ -1,6 +1,9 @@
 import sys
 import time     # for timing
-from os.path import isfile
+import heapq    # for merging the files by date
+from concurrent.futures import ProcessPoolExecutor  # for reading the files in parallel
+from glob import glob
+from os.path import basename, isfile, realpath
 
 """
 Author: Maxwell Aladago '18
@@ -207,20 +210,120 @@ class Task1(object):
         """
         return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
 
-    def task1(self, filename):
+    def read_indicator(self, filename, indicator):
         """
-        This module calls others defined in this module to complete the task.
-        It also writes the required answers to the same directory directory of this file
-        :param filename: The name of the file containing the ebola data. Should have at least 5 columns
+        A generator over the rows of one indicator in a file. Unlike read_data(), only
+        the current row is kept in memory
+        :param filename: The name of the file containing the data
+        :param indicator: The end of the indicator name. '_deaths' or '_cases'
+        :return: Yields tuples of the form (date, value)
+        """
+        with open(filename) as eboladata:
+            eboladata.__next__()  # skip header
+            for row in eboladata:
+                row = row.split(",")
+                if row[2].endswith(indicator):
+                    yield row[3], int(row[4])
+
+    def merge_indicator(self, series):
+        """
+        This method k-way merges the values of one indicator from several files into a single
+        cumulative series. The streams are merged by date with a heap so only the head of each
+        stream is compared at any time. Each stream must already be sorted by date, which is
+        the case for the simple data files. A ValueError is raised otherwise.
+        :param series: A list of (filename, rows) pairs, one for each file, where rows is an
+            iterable of (date, value) pairs, e.g. from read_indicator()
         :return:
-            Write two files task1-answers-<filename> and task1_answers-<filename> to the folder containing
-            this file.
+            merged_dates: The dates observed in any of the files from the first date every file has
+            reported on, in increasing order
+            merged_vals: The combined cumulative value on each date. It is the sum of the value of
+            every file on that date, interpolated linearly between its two closest reports. After its
+            last report, the last value of a file is used
         """
-        # time.time() returns seconds
-        pre_process_time = time.time()
-        death_dates, death_vals, infection_dates, infection_vals = self.read_data(filename)
-        pre_process_time = time.time() - pre_process_time
+        # The files report on different days. Using the last reported value of each file would
+        # put a whole week's increase of one file in the one day until another file reports, giving
+        # false peak rates. Instead, each file increases at its own rate between two of its reports,
+        # so the rate between two merged dates is the sum of the rates of the files on those days.
+        # The value of a file on a date is its value at the start of its current interval
+        # + its rate * the days since that start.
+        num_files = len(series)
+        start_days = [0] * num_files
+        start_vals = [0] * num_files
+        day_rates = [0] * num_files
+        started = [False] * num_files
+        num_started = 0
+        merged_dates = []
+        merged_vals = []
+        prev_days = None
+
+        streams = [self.dated_stream(index, filename, rows) for index, (filename, rows) in enumerate(series)]
+        for days, index, date, value, rate in heapq.merge(*streams):
+            if not started[index]:
+                started[index] = True
+                num_started += 1
+            start_days[index] = days
+            start_vals[index] = value
+            day_rates[index] = rate
+
+            # the region total is incomplete until every file has reported
+            if num_started < num_files:
+                continue
+
+            total = sum(start_vals[i] + day_rates[i] * (days - start_days[i]) for i in range(num_files))
+
+            # several files may report on the same date. keep one entry per date
+            # otherwise rates() will divide by an interval of zero days
+            if days == prev_days:
+                merged_vals[-1] = total
+            else:
+                merged_dates.append(date)
+                merged_vals.append(total)
+                prev_days = days
+
+        return merged_dates, merged_vals
+
+    def dated_stream(self, index, filename, rows):
+        """
+        A generator which pairs each value of a file with the number of days of its date and the
+        daily rate until the next value of the file. The tuples are ordered by days first so they
+        can be merged with heapq.merge()
+        :param index: The position of the file in the list of files being merged
+        :param filename: The name of the file, for the error message
+        :param rows: The (date, value) pairs for a given indicator in the file
+        :return: Yields tuples of the form (days, index, date, value, rate). The rate of the
+        last value is 0
+        Raises a ValueError if a date is not after the previous one. heapq.merge() would
+        otherwise silently produce dates out of order
+        """
+        # each value is yielded once the next one is read, since its rate depends on it
+        prev_days = None
+        prev_date = ""
+        prev_value = 0
+        for date, value in rows:
+            days = self.compute_days(date)
+            if prev_days is not None:
+                if days <= prev_days:
+                    raise ValueError(filename + ": " + date + " comes after " + prev_date +
+                                     ". The rows must be sorted by date")
+                yield prev_days, index, prev_date, prev_value, (value - prev_value) / (days - prev_days)
+            prev_days = days
+            prev_date = date
+            prev_value = value
+
+        if prev_days is not None:
+            yield prev_days, index, prev_date, prev_value, 0
 
+    def answer_questions(self, death_dates, death_vals, infection_dates, infection_vals):
+        """
+        This method answers questions a to g for one set of death and infection records
+        :param death_dates: The dates of the cumulative deaths
+        :param death_vals: The cumulative deaths
+        :param infection_dates: The dates of the cumulative cases
+        :param infection_vals: The cumulative cases
+        :return:
+            outputs: The answers to the questions, one string per question
+            times: The time taken by each of questions a to f
+        """
         # Question a
         a_time = time.time()
         date_last_infection = self.last_occurrence_date(infection_dates, infection_vals)
@@ -263,11 +366,21 @@ class Task1(object):
                              str(numpeak_deaths) + ", " + ", ".join(peak_death_rates_date)
         ]
 
-        times = [pre_process_time, a_time, b_time, c_time, d_time, e_time, f_time]
+        times = [a_time, b_time, c_time, d_time, e_time, f_time]
+        return outputs, times
 
-        # Write answers to files
-        answers = "task1_answers-%s" % filename
-        timings = "task1_times-%s" % filename
+    def write_answers(self, name, outputs, times):
+        """
+        Writes the answers and the timings to the directory the program is run from
+        :param name: The name the output files are derived from. Only the base name is used
+        so input files from other directories can be used
+        :param outputs: The answers to the questions
+        :param times: The time taken by each of the steps
+        :return:
+            Write two files task1_answers-<name> and task1_times-<name>
+        """
+        answers = "task1_answers-%s" % basename(name)
+        timings = "task1_times-%s" % basename(name)
 
         mills = 1e3
         with open(answers, 'wt') as outputfile, open(timings, 'wt') as timesfile:
@@ -276,22 +389,106 @@ class Task1(object):
             # Write overall time of the program last
             timesfile.write("\n" + str((time.time() - start_time) * mills) + "\n")
 
+    def task1(self, filename):
+        """
+        This module calls others defined in this module to complete the task.
+        It also writes the required answers to the same directory directory of this file
+        :param filename: The name of the file containing the ebola data. Should have at least 5 columns
+        :return:
+            Write two files task1-answers-<filename> and task1_answers-<filename> to the folder containing
+            this file.
+        """
+        outputs, times = self.answer_file(filename)
+        self.write_answers(filename, outputs, times)
+
+    def answer_file(self, filename):
+        """
+        Reads a file and answers the questions for it
+        :param filename: The name of the file containing the ebola data
+        :return:
+            outputs: The answers to the questions
+            times: The time taken to read the file followed by the time taken by questions a to f
+        """
+        # time.time() returns seconds
+        pre_process_time = time.time()
+        death_dates, death_vals, infection_dates, infection_vals = self.read_data(filename)
+        pre_process_time = time.time() - pre_process_time
+
+        outputs, times = self.answer_questions(death_dates, death_vals, infection_dates, infection_vals)
+        return outputs, [pre_process_time] + times
+
+    def task1_many(self, filenames):
+        """
+        Completes the task for several files, e.g. one file per country, in one run.
+        The files are answered in parallel as in task1(), each in its own process which only
+        returns the answers. The files are then read again as streams and merged by date to
+        answer the same questions for the whole region, so no file is ever held in memory as
+        a whole by this process. Only the merged series are, since the questions need them.
+        :param filenames: The names of the files containing the ebola data. No two may have the
+            same base name and none may be named combined.csv
+        :return:
+            Write task1_answers-<filename> and task1_times-<filename> for each file, and
+            task1_answers-combined.csv and task1_times-combined.csv for the region. The combined
+            answers have two more lines: the total cumulative cases and the total cumulative deaths.
+            All times files have the same layout as in task1(). In task1_times-combined.csv the
+            first line is the time taken to merge the files instead of the time taken to read one.
+        """
+        with ProcessPoolExecutor() as executor:
+            answers = list(executor.map(self.answer_file, filenames))
+
+        for filename, (outputs, times) in zip(filenames, answers):
+            self.write_answers(filename, outputs, times)
+
+        merge_time = time.time()
+        death_dates, death_vals = self.merge_indicator([(f, self.read_indicator(f, "_deaths")) for f in filenames])
+        infection_dates, infection_vals = self.merge_indicator([(f, self.read_indicator(f, "_cases")) for f in filenames])
+        merge_time = time.time() - merge_time
+
+        outputs, times = self.answer_questions(death_dates, death_vals, infection_dates, infection_vals)
+        outputs += [str(infection_vals[-1]), str(death_vals[-1])]
+        self.write_answers("combined.csv", outputs, [merge_time] + times)
+
 
 if __name__ == '__main__':
     # program name is at argv[0].
-    try:
-        filename = sys.argv[1]
-    except IndexError:
-        print("Error: The program requires a two strings as arguments")
+    # each argument is a file name or a glob pattern such as data/*.csv.
+    # a file matched more than once is only kept the first time, otherwise it
+    # would be counted several times in the combined answers
+    filenames = []
+    seen = set()
+    for pattern in sys.argv[1:]:
+        for filename in sorted(glob(pattern)) or [pattern]:
+            path = realpath(filename)
+            if path not in seen:
+                seen.add(path)
+                filenames.append(filename)
+
+    if not filenames:
+        print("Error: The program requires at least one file name as argument")
         sys.exit()
 
-    if not isfile(filename):
-        sys.exit("Error: " + filename + " is not a name of a valid file")
+    for filename in filenames:
+        if not isfile(filename):
+            sys.exit("Error: " + filename + " is not a name of a valid file")
+
+    # the output files are named after the base name of each file. two files with the same
+    # base name, or a file named like the combined output, would overwrite each other's answers
+    if len(filenames) > 1:
+        names = [basename(filename) for filename in filenames] + ["combined.csv"]
+        for name in names:
+            if names.count(name) > 1:
+                sys.exit("Error: more than one output is named " + name + ". Rename the input files")
 
     # start timer instantiate class and run programs
     global start_time
     start_time = time.time()
     t1 = Task1()
-    t1.task1(filename)
+    if len(filenames) == 1:
+        t1.task1(filenames[0])
+    else:
+        try:
+            t1.task1_many(filenames)
+        except ValueError as error:
+            sys.exit("Error: " + str(error))
 
 
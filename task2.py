@@ -1,6 +1,12 @@
 import sys  # for command line arguments
 import time  # for timing
-from os.path import isfile
+from array import array  # for reading values straight into a buffer numpy can use
+from os.path import basename, isfile
+
+try:
+    import numpy as np  # optional. only needed for the numpy search
+except ImportError:
+    np = None
 
 """
 Author: Maxwell Aladago '18
@@ -15,6 +21,10 @@ The Knutt-Morris-Pratt algorithm and the Boyer-Moore algorithm, both published i
 arbitrary threshold. I used 10 here. This implementation of Boyer-Moore algorithms uses,
 both bad item skip rule and good suffix rules for pattern re-alignments:
 Any of the method works independently through
+
+The numpy search is an alternative for long series. It compares all the windows of the
+series with the pattern at once instead of item by item, using rolling hashes when the first
+item of the pattern is too common. It is only used when asked for since numpy is not always available.
 References: 
 1.  Mandumula, K. K. (2011). Knuth-morris-pratt. Indiana State University. Retrieved from http://cs
 .indstate.edu/̃kmandumula/kranthi.pdf
@@ -44,6 +54,16 @@ class Task2(object):
         # self._bm_good_suffix[i] shows the number of steps to take
         # if a mismatch happens at pattern[i-1]
         self._bad_item_skips = {}  # The bad item skip values of the patten for boyer-moore
+        self._np_pattern = None    # The pattern as a numpy array of integers for the numpy search
+
+        # The complex data concatenated for the numpy search. Unlike the above, they are built
+        # from the data, once per complex_data_dic, and reused for every pattern.
+        self._np_data = None       # The complex_data_dic the following were built from
+        self._np_series = []       # (local, indicator, dates) of each series
+        self._np_starts = []       # The index of the first value of each series in self._np_values
+        self._np_values = None     # All the values, as a numpy array of integers
+        self._np_powers = None     # The powers of the hash base, for the rolling hashes
+        self._np_prefix = None     # The prefix hashes of self._np_values
 
     def construct_pattern(self, partial_data_file):
         """
@@ -53,20 +73,24 @@ class Task2(object):
         :return:
             Modifies the contents of self._pattern & self._pattern_ln
         """
+        # values are compared as integers, the same as the complex data
         with open(partial_data_file, encoding='utf-8-sig') as partial_data:
-            self._pattern = [row.split()[0] for row in partial_data]
+            self._pattern = [int(row.split()[0]) for row in partial_data]
 
         self._pattern_ln = len(self._pattern)
 
-    def read_complex_data(self, complex_ebola_file):
+    def read_complex_data(self, complex_ebola_file, use_numpy=False):
         """
         This function reads in the complex data. It performs pre-processing tasks as well
          by generating creating a dictionary out of the complex file
         :param complex_ebola_file:
+        :param use_numpy: boolean indicating whether the values are kept in an array('q') instead
+            of a list. numpy uses the array without converting each value. default is False
         :return:
          complex_data_dic: Is a nested dictionary representation of the complex file. It has the format
             dic ={a:{i:[[date], [val]]}} where 'a' is a locality = country + locality, 'i' is one of the
-            two possible indicators (cumulative_cases, cumulative_deaths)
+            two possible indicators (cumulative_cases, cumulative_deaths). The values are integers
+            so all the search algorithms compare them the same way, e.g. '007' matches '7'
         """
 
         # If the following loop add new keys for both locals and indicators or update values as necessary
@@ -77,6 +101,7 @@ class Task2(object):
         # are not hashed twice during updates.
 
         complex_data_dic = {}
+        values_type = array if use_numpy else list
 
         with open(complex_ebola_file) as complex_data:
             complex_data.__next__()
@@ -84,18 +109,29 @@ class Task2(object):
                 row = row.split(",")
                 local_key = " ".join(row[0:2])
                 indicator = row[2]
-                value = row[4][0:-1]
+                value = int(row[4])
                 try:
                     try:
                         complex_data_dic[local_key][indicator][0].append(row[3])
                         complex_data_dic[local_key][indicator][1].append(value)
                     except KeyError:
-                        complex_data_dic[local_key][indicator] = [[row[3]], [value]]
+                        complex_data_dic[local_key][indicator] = [[row[3]], self.new_values(values_type, value)]
                 except KeyError:
-                    complex_data_dic[local_key] = {indicator: [[row[3]], [value]]}
+                    complex_data_dic[local_key] = {indicator: [[row[3]], self.new_values(values_type, value)]}
 
         return complex_data_dic
 
+    def new_values(self, values_type, value):
+        """
+        Creates the values of a new series of the complex data
+        :param values_type: list or array
+        :param value: The first value of the series
+        :return: A list or an array('q') of integers containing value
+        """
+        if values_type is array:
+            return array('q', [value])
+        return [value]
+
     def mine(self, complex_data_dic, use_kmp=False):
         """
         This method digs into the data searching for a pattern in the data. Calls search pattern()
@@ -230,6 +266,125 @@ class Task2(object):
 
         return -1
 
+    def mine_numpy(self, complex_data_dic):
+        """
+        The numpy version of mine(). All the series are searched in one call.
+        :param complex_data_dic: An object of type dict, built from the complex data file.
+            Values kept in arrays, i.e. read with use_numpy=True, are the fastest to concatenate.
+            The concatenation is reused as long as the same dictionary is searched
+        :return:
+            The same as mine()
+        """
+        if self._np_data is not complex_data_dic:
+            self.concatenate_series(complex_data_dic)
+
+        search_index = self.search_numpy()
+        if search_index > -1:
+            i = int(np.searchsorted(self._np_starts, search_index, side='right')) - 1
+            local, indicator, dates = self._np_series[i]
+            return local, indicator, dates[search_index - self._np_starts[i]]
+
+        return "No ", "pattern", "found"
+
+    def concatenate_series(self, complex_data_dic):
+        """
+        Concatenates all the series of the complex data, separated by -1, for the numpy search.
+        Values are counts so -1 never appears in the pattern and a match cannot run across two series.
+        :param complex_data_dic: An object of type dict, built from the complex data file.
+        :return:
+            Modifies the contents of self._np_data, self._np_series, self._np_starts and self._np_values.
+            Resets self._np_powers and self._np_prefix
+        """
+        # dicts keep insertion order so the first match is the same as in mine()
+        separator = np.array([-1], dtype=np.int64)
+        parts = []
+        self._np_series = []
+        self._np_starts = []
+        offset = 0
+        for local, row in complex_data_dic.items():
+            for indicator, vals in row.items():
+                self._np_series.append((local, indicator, vals[0]))
+                self._np_starts.append(offset)
+                # an array('q') is used without copying each value. a list is converted
+                parts.append(np.asarray(vals[1], dtype=np.int64))
+                parts.append(separator)
+                offset += len(vals[1]) + 1
+
+        self._np_data = complex_data_dic
+        self._np_values = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        self._np_powers = None
+        self._np_prefix = None
+
+    def search_numpy(self):
+        """
+        Finds self._np_pattern in self._np_values by comparing many windows of values with the pattern at once.
+        The windows starting with the first item of the pattern are compared directly. If there are
+        too many of them, the hash of every window is computed instead and only the windows whose
+        hash matches that of the pattern are compared.
+        :return:
+            The starting index of the pattern in self._np_values on success. returns -1 otherwise
+        """
+        values = self._np_values
+        m = self._pattern_ln
+        ln = len(values)
+        if m == 0 or m > ln:
+            return -1
+
+        # one row per window. sliding_window_view does not copy values
+        windows = np.lib.stride_tricks.sliding_window_view(values, m)
+        candidates = np.flatnonzero(windows[:, 0] == self._np_pattern[0])
+
+        # comparing the candidates copies len(candidates) * m items. keep it below ln, whatever
+        # the length of the pattern, and use the rolling hashes otherwise
+        if len(candidates) * m <= ln:
+            matches = np.flatnonzero((windows[candidates] == self._np_pattern).all(axis=1))
+            return int(candidates[matches[0]]) if len(matches) else -1
+
+        if self._np_prefix is None:
+            self.hash_prefix()
+
+        # the hash of the window starting at i is prefix[i + m] - prefix[i] = b^i * hash(window).
+        # The pattern is compared after multiplying its hash by b^i too.
+        # b is odd so b^i never maps two hashes to one.
+        powers = self._np_powers
+        prefix = self._np_prefix
+        with np.errstate(over='ignore'):
+            pattern_hash = np.sum(self._np_pattern.astype(np.uint64) * powers[:m], dtype=np.uint64)
+            window_hashes = prefix[m:] - prefix[:-m]
+            candidates = np.flatnonzero(window_hashes == pattern_hash * powers[:ln - m + 1])
+
+        # verify the candidates since different windows may have the same hash
+        for index in candidates:
+            if np.array_equal(windows[index], self._np_pattern):
+                return int(index)
+
+        return -1
+
+    def hash_prefix(self):
+        """
+        Computes the prefix polynomial hashes of self._np_values with base b. uint64 arithmetic
+        wraps, i.e. it is done modulo 2^64. prefix[i] is the sum of values[k] * b^k for k < i.
+        They only depend on the values so they are computed once for all the patterns.
+        :return:
+        Modifies the contents of self._np_powers and self._np_prefix
+        """
+        ln = len(self._np_values)
+        with np.errstate(over='ignore'):
+            powers = np.full(ln, 1000003, dtype=np.uint64)
+            powers[0] = 1
+            self._np_powers = np.cumprod(powers, dtype=np.uint64)
+
+            self._np_prefix = np.zeros(ln + 1, dtype=np.uint64)
+            np.cumsum(self._np_values.astype(np.uint64) * self._np_powers, out=self._np_prefix[1:])
+
+    def numpy_pattern(self):
+        """
+        Converts the pattern to a numpy array of integers for the numpy search.
+        :return:
+        Modifies the contents of self._np_pattern
+        """
+        self._np_pattern = np.array(self._pattern, dtype=np.int64)
+
     def suffix(self):
         """
         A method to compute the suffix list of size = len(pattern).
@@ -333,41 +488,58 @@ class Task2(object):
             if i == case_two_skip:
                 case_two_skip = borders[i]
 
-    def task2(self, complex_ebola_file, partial_data_file):
+    def task2(self, complex_ebola_file, partial_data_file, algorithm=None):
         """
         The is calls the other functions to complete task2
         :param complex_ebola_file: The path to the complex-sample data
         :param partial_data_file: The file containing the partial data
+        :param algorithm: One of 'kmp', 'boyer-moore' or 'numpy'. By default, kmp is used for
+            small patterns and boyer-moore for the others
         :return:
             Write a file task2_results-<partial_data_file> to the folder containing this file
         """
 
         global time_start
         self.construct_pattern(partial_data_file)
-        complex_data_dic = self.read_complex_data(complex_ebola_file)
+        complex_data_dic = self.read_complex_data(complex_ebola_file, algorithm == "numpy")
+        local, indicator, start_date = self.search_data(complex_data_dic, algorithm)
+        filename = "task2_result-%s" % basename(partial_data_file)
+
+        # time.time() returns seconds
+        mills = 1e3
+        contents = [local, indicator, start_date]
+        with open(filename, 'wt') as results:
+            results.write("\n".join(contents))
+            # write overall runtime last
+            results.write("\n" + str((time.time() - time_start) * mills) + "\n")
 
+    def search_data(self, complex_data_dic, algorithm=None):
+        """
+        Pre-processes the pattern for the chosen algorithm and searches the complex data with it.
+        :param complex_data_dic: An object of type dict, built from the complex data file.
+        :param algorithm: One of 'kmp', 'boyer-moore' or 'numpy'. By default, kmp is used for
+            small patterns and boyer-moore for the others
+        :return:
+            The same as mine()
+        """
         # use knutt-morris-pratt for search when pattern length is small
         # calling suffix() modifies the contents of self._kmp_suffix.
         # bad_item_list() modifies the contents of self_bad_item_skips
         # bm_suffix_table() modifies the contents of self._bm_good_suffix
-        if self._pattern_ln < 10:
+        # numpy_pattern() modifies the contents of self._np_pattern
+        if algorithm is None:
+            algorithm = "kmp" if self._pattern_ln < 10 else "boyer-moore"
+
+        if algorithm == "numpy":
+            self.numpy_pattern()
+            return self.mine_numpy(complex_data_dic)
+        elif algorithm == "kmp":
             self.suffix()
-            use_kmp = True
+            return self.mine(complex_data_dic, True)
         else:
             self.bad_item_list()
             self.bm_suffix_table()
-            use_kmp = False
-
-        local, indicator, start_date = self.mine(complex_data_dic, use_kmp)
-        filename = "task2_result-%s" % partial_data_file
-
-        # time.time() returns seconds
-        mills = 1e3
-        contents = [local, indicator, start_date]
-        with open(filename, 'wt') as results:
-            results.write("\n".join(contents))
-            # write overall runtime last
-            results.write("\n" + str((time.time() - time_start) * mills) + "\n")
+            return self.mine(complex_data_dic, False)
 
 
 def check_file_exist(filename):
@@ -388,6 +560,13 @@ if __name__ == '__main__':
         print("Error: The program requires two strings as arguments")
         sys.exit()
 
+    # optional third argument: the search algorithm. kmp, boyer-moore or numpy
+    search_algorithm = sys.argv[3] if len(sys.argv) > 3 else None
+    if search_algorithm not in (None, "kmp", "boyer-moore", "numpy"):
+        sys.exit("Error: the algorithm must be one of kmp, boyer-moore or numpy")
+    if search_algorithm == "numpy" and np is None:
+        sys.exit("Error: numpy is required for the numpy search")
+
     # verify that files can be opened
     check_file_exist(complex_filename)
     check_file_exist(partial_filename)
@@ -395,4 +574,4 @@ if __name__ == '__main__':
     global time_start
     time_start = time.time()
     t2 = Task2()
-    t2.task2(complex_filename, partial_filename)
+    t2.task2(complex_filename, partial_filename, search_algorithm)